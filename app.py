@@ -1,13 +1,13 @@
 import streamlit as st
-import torch
-import torch.nn as nn
 from PIL import Image
-import numpy as np
 import io
 import os
 import base64
-import segmentation_models_pytorch as smp
-import gdown   # for downloading model
+from engine import MODEL_PATH, TIERS, DEFAULT_TIER, DISPLAY_SIZE, load_model, open_image, preprocess, predict_mask, apply_bg, render_gallery, BG_OPTIONS
+from dedup import HistoryIndex, DEFAULT_THRESHOLD, output_name
+from workers import WorkerPool
+from profiling import profile_request, stage
+from membudget import BUDGET, estimate_request_bytes
 
 # --------------------------------------
 # APP CONFIG
@@ -83,92 +83,26 @@ st.markdown(f"""
 # --------------------------------------
 # MODEL DOWNLOAD + LOAD (FINAL FIX)
 # --------------------------------------
-MODEL_PATH = "model.pth"  # safe filename
-DRIVE_URL = "https://drive.google.com/uc?export=download&id=18EbciqL5HdLzLo6SoM52VRE7nwfxDBtr"
+# VISIONEXTRACT_WORKERS=N sends inference to a pool of N
+# pinned CPU processes instead of this server process
+WORKERS = int(os.environ.get("VISIONEXTRACT_WORKERS", "0"))
 
-def download_model():
+@st.cache_resource
+def get_model():
     if not os.path.exists(MODEL_PATH):
         st.warning("Downloading model… please wait ⏳")
-        gdown.download(DRIVE_URL, MODEL_PATH, quiet=False)
-    else:
-        print("Model already exists")
+    return load_model()
 
 @st.cache_resource
-def load_model():
-    device = "cuda" if torch.cuda.is_available() else "cpu"
-
-    # download model first
-    download_model()
-
-    # build architecture
-    model = smp.Unet(
-        encoder_name="resnet101",
-        encoder_weights="imagenet",
-        in_channels=3,
-        classes=1,
-        activation=None
-    )
-
-    # extra mask refinement head
-    model.extra_head = nn.Sequential(
-        nn.Conv2d(1, 64, 3, padding=1),
-        nn.ReLU(),
-        nn.Conv2d(64, 32, 3, padding=1),
-        nn.ReLU(),
-        nn.Conv2d(32, 16, 3, padding=1),
-        nn.ReLU(),
-        nn.Conv2d(16, 1, 1)
-    )
-
-    # forward override
-    orig_forward = model.forward
-    def new_forward(x):
-        return model.extra_head(orig_forward(x))
-    model.forward = new_forward
-
-    # load weights
-    model.load_state_dict(torch.load(MODEL_PATH, map_location=device))
-    model.to(device)
-    model.eval()
-    return model, device
-
-model, device = load_model()
+def get_pool():
+    if not os.path.exists(MODEL_PATH):
+        st.warning("Downloading model… please wait ⏳")
+    return WorkerPool(WORKERS)
 
-# --------------------------------------
-# FUNCTIONS
-# --------------------------------------
-def preprocess(img):
-    img = img.resize((350, 350))
-    arr = np.array(img) / 255.0
-    arr = torch.tensor(arr, dtype=torch.float32).permute(2,0,1).unsqueeze(0)
-    return arr.to(device)
-
-def predict_mask(x):
-    with torch.no_grad():
-        pred = torch.sigmoid(model(x))
-        return (pred > 0.5).float()
-
-def apply_bg(mask, img, opt, custom=None):
-    mask_np = mask.squeeze().cpu().numpy()
-    mask3 = np.repeat(mask_np[...,None], 3, axis=2)
-    img_np = np.array(img) / 255
-
-    if opt=="Black": bg = np.zeros_like(img_np)
-    elif opt=="White": bg = np.ones_like(img_np)
-    elif opt=="Steel Blue": bg = np.full_like(img_np, [127/255,167/255,201/255])
-    elif opt=="Gradient":
-        x = np.linspace(0,1,350)
-        bg = np.stack([np.tile(x,(350,1))]*3, axis=2)
-    elif opt=="Pattern":
-        p = np.indices((350,350)).sum(0) % 2
-        bg = np.stack([p,p,p], axis=2)
-    elif opt=="Custom Image" and custom is not None:
-        bg = np.array(custom.resize((350,350))) / 255
-    else:
-        bg = np.zeros_like(img_np)
-
-    out = img_np * mask3 + bg * (1 - mask3)
-    return (out * 255).astype("uint8")
+if WORKERS > 0:
+    pool = get_pool()
+else:
+    model, device = get_model()
 
 # --------------------------------------
 # TITLE
@@ -200,8 +134,14 @@ st.markdown("---")
 # --------------------------------------
 # BACKGROUND OPTIONS
 # --------------------------------------
-bg_opt = st.selectbox("Select Background",
-                      ["Black","White","Steel Blue","Gradient","Pattern","Custom Image"])
+bg_opt = st.selectbox("Select Background", BG_OPTIONS)
+show_gallery = st.toggle("Compare all backgrounds", value=False)
+
+tier_names = list(TIERS)
+tier = st.selectbox("Quality",
+                    tier_names,
+                    index=tier_names.index(DEFAULT_TIER),
+                    help="Working resolution: " + ", ".join(f"{t} {px}px" for t, px in TIERS.items()))
 
 custom = None
 if bg_opt == "Custom Image":
@@ -215,12 +155,54 @@ if bg_opt == "Custom Image":
 uploaded = st.file_uploader("Upload your image", type=["png","jpg","jpeg"])
 
 if uploaded:
-    img = Image.open(uploaded).convert("RGB").resize((350,350))
-    tensor = preprocess(img)
-    mask = predict_mask(tensor)
-
-    out_arr = apply_bg(mask, img, bg_opt, custom)
-    out_img = Image.fromarray(out_arr)
+    data = uploaded.getvalue()
+    # decode no larger than the working resolution needs
+    src = open_image(data, max(TIERS[tier], DISPLAY_SIZE))
+    img = src.resize((DISPLAY_SIZE,DISPLAY_SIZE))
+
+    # the reservation covers every large intermediate below; each one
+    # is dropped as soon as the next stage no longer needs it
+    need = estimate_request_bytes(src.size, TIERS[tier], DISPLAY_SIZE)
+    with BUDGET.request(need, uploaded.name) as mem:
+        # reuse the mask of an exact / near-duplicate upload
+        index = HistoryIndex()
+        threshold = st.session_state.get("dedup_threshold", DEFAULT_THRESHOLD)
+        seen_key = (uploaded.file_id, tier)
+        first_run = st.session_state.get("dedup_seen") != seen_key
+        entry, kind, sha, h = index.lookup(data, src, tier, threshold, record=first_run)
+        # on reruns the upload finds itself; report what its first lookup found
+        if first_run:
+            st.session_state["dedup_kind"] = kind
+        st.session_state["dedup_seen"] = seen_key
+        kind = st.session_state["dedup_kind"]
+
+        # ?profile=1 traces this request into profiles/
+        with profile_request(None if WORKERS > 0 else model, "app",
+                             enabled=st.query_params.get("profile") == "1") as prof:
+            if entry is not None:
+                mask = index.load_mask(entry)
+            else:
+                if WORKERS > 0:
+                    mask = pool.extract(data, tier)
+                else:
+                    with stage(prof, "preprocess"):
+                        tensor = preprocess(src, TIERS[tier], device)
+                    with stage(prof, "predict_mask"):
+                        mask = predict_mask(model, tensor, (DISPLAY_SIZE, DISPLAY_SIZE))
+                    del tensor
+                entry = index.add(sha, h, tier, mask)
+            del src, data
+
+            with stage(prof, "apply_bg"):
+                out_arr = apply_bg(mask, img, bg_opt, custom)
+                out_img = Image.fromarray(out_arr)
+                del out_arr
+
+        # encode once; the same bytes go to history and the download link
+        buf = io.BytesIO()
+        out_img.save(buf, format="PNG")
+        png = buf.getvalue()
+        del buf
 
     c4, c5, c6 = st.columns([1,2,1])
     with c5:
@@ -234,16 +216,34 @@ if uploaded:
             st.markdown("<h4 style='text-align:center;'>Extracted Output</h4>", unsafe_allow_html=True)
             st.image(out_img)
 
-    # Save history
+    # Background gallery (same mask, no extra inference)
+    if show_gallery:
+        names, thumbs = render_gallery(mask, img, BG_OPTIONS, custom)
+        st.markdown("<h4 style='text-align:center;'>All Backgrounds</h4>", unsafe_allow_html=True)
+        st.image(list(thumbs), caption=names, width=thumbs.shape[2])
+
+    # Save history (once per image + background)
     os.makedirs("history", exist_ok=True)
-    out_img.save("history/latest.png")
-    count = len([f for f in os.listdir("history") if f.endswith(".png")])
-    out_img.save(f"history/output_{count+1}.png")
+    with open("history/latest.png", "wb") as f:
+        f.write(png)
+    fname = index.output_for(entry, bg_opt) if custom is None else None
+    if fname is None:
+        fname = output_name(sha, bg_opt)
+        with open(f"history/{fname}", "wb") as f:
+            f.write(png)
+        if custom is None:
+            index.set_output(entry, bg_opt, fname)
+    index.save()
+
+    if kind != "miss":
+        st.caption(f"Matched a previous upload ({kind} duplicate), reused its mask.")
+    st.caption(f"Memory: estimate {mem['estimate_mb']:.0f} MB, process peak RSS "
+               f"{mem['peak_rss_mb']:.0f} MB (+{mem['delta_mb']:.0f}) with up to "
+               f"{mem['max_in_flight']} requests in flight.")
 
     # Download button
-    buf = io.BytesIO()
-    out_img.save(buf, format="PNG")
-    b64 = base64.b64encode(buf.getvalue()).decode()
+    b64 = base64.b64encode(png).decode()
+    del png
 
     st.markdown(
         f"""
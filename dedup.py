@@ -0,0 +1,154 @@
+import contextlib
+import hashlib
+import json
+import os
+import time
+import numpy as np
+import torch
+from PIL import Image
+
+try:
+    import fcntl
+except ImportError:   # Windows: no cross-process lock
+    fcntl = None
+
+# --------------------------------------
+# DUPLICATE DETECTION
+# every processed upload is indexed by its sha256 (exact
+# re-uploads) and a 64-bit difference hash (near duplicates:
+# re-encoded, resized or lightly edited copies); a hit reuses
+# the stored mask and the history file already written for it
+#
+# several sessions share one index file: each HistoryIndex only
+# remembers its own additions, and save() re-reads the file
+# under an flock and merges them in, so concurrent saves
+# never drop each other's entries or stats
+# --------------------------------------
+HISTORY_DIR = "history"
+INDEX_PATH = os.path.join(HISTORY_DIR, "index.json")
+
+DEFAULT_THRESHOLD = 6   # max differing bits out of 64 for a near duplicate
+
+
+def dhash(img, size=8):
+    small = np.asarray(img.convert("L").resize((size + 1, size)), dtype=np.int16)
+    bits = (small[:, 1:] > small[:, :-1]).flatten()
+    return int("".join("1" if b else "0" for b in bits), 2)
+
+
+def hamming(a, b):
+    return bin(a ^ b).count("1")
+
+
+def output_name(sha, bg_opt):
+    # unique per image + background and never reused after a deletion,
+    # unlike a running count; the timestamp keeps newest-first order
+    slug = bg_opt.lower().replace(" ", "-")
+    return f"output_{time.strftime('%Y%m%d-%H%M%S')}_{sha[:12]}_{slug}.png"
+
+
+class HistoryIndex:
+    def __init__(self, path=INDEX_PATH):
+        self.path = path
+        self.history_dir = os.path.dirname(path) or "."
+        self.mask_dir = os.path.join(self.history_dir, "masks")
+        self.stats = {"exact": 0, "near": 0, "miss": 0}
+        self._added = []
+        self._outputs = []
+        self._counts = {"exact": 0, "near": 0, "miss": 0}
+        self.entries, stored = self._read()
+        self.stats.update(stored)
+
+    def _read(self):
+        if not os.path.exists(self.path):
+            return [], {}
+        with open(self.path) as f:
+            data = json.load(f)
+        return data.get("entries", []), data.get("stats", {})
+
+    @contextlib.contextmanager
+    def _lock(self):
+        os.makedirs(self.history_dir, exist_ok=True)
+        with open(self.path + ".lock", "a") as f:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(f, fcntl.LOCK_UN)
+
+    def save(self):
+        with self._lock():
+            entries, stored = self._read()
+            by_key = {(e["sha"], e["tier"]): e for e in entries}
+            for e in self._added:
+                if (e["sha"], e["tier"]) not in by_key:
+                    entries.append(e)
+                    by_key[e["sha"], e["tier"]] = e
+            for sha, tier, bg_opt, fname in self._outputs:
+                if (sha, tier) in by_key:
+                    by_key[sha, tier]["outputs"][bg_opt] = fname
+            stats = {k: stored.get(k, 0) + n for k, n in self._counts.items()}
+
+            tmp = self.path + ".tmp"
+            with open(tmp, "w") as f:
+                json.dump({"entries": entries, "stats": stats}, f)
+            os.replace(tmp, self.path)
+
+        self.entries, self.stats = entries, stats
+        self._added, self._outputs = [], []
+        self._counts = dict.fromkeys(self._counts, 0)
+
+    def lookup(self, data, img, tier, threshold=DEFAULT_THRESHOLD, record=True):
+        sha = hashlib.sha256(data).hexdigest()
+        h = dhash(img)
+
+        kind, found = "miss", None
+        candidates = [e for e in self.entries
+                      if e["tier"] == tier and os.path.exists(e["mask"])]
+        for e in candidates:
+            if e["sha"] == sha:
+                kind, found = "exact", e
+                break
+        else:
+            if candidates and threshold > 0:
+                best = min(candidates, key=lambda e: hamming(e["hash"], h))
+                if hamming(best["hash"], h) <= threshold:
+                    kind, found = "near", best
+
+        if record:
+            self.stats[kind] += 1
+            self._counts[kind] += 1
+        return found, kind, sha, h
+
+    def add(self, sha, h, tier, mask):
+        os.makedirs(self.mask_dir, exist_ok=True)
+        mask_path = os.path.join(self.mask_dir, f"{sha[:16]}_{tier}.png")
+        mask_np = (mask.squeeze().cpu().numpy() * 255).astype("uint8")
+        Image.fromarray(mask_np).save(mask_path)
+        entry = {"sha": sha, "hash": h, "tier": tier, "mask": mask_path, "outputs": {}}
+        self.entries.append(entry)
+        self._added.append(entry)
+        return entry
+
+    def load_mask(self, entry):
+        arr = np.asarray(Image.open(entry["mask"]), dtype=np.float32) / 255.0
+        return torch.from_numpy((arr > 0.5).astype(np.float32))[None, None]
+
+    def output_for(self, entry, bg_opt):
+        fname = entry["outputs"].get(bg_opt)
+        if fname and os.path.exists(os.path.join(self.history_dir, fname)):
+            return fname
+        entry["outputs"].pop(bg_opt, None)
+        return None
+
+    def set_output(self, entry, bg_opt, fname):
+        entry["outputs"][bg_opt] = fname
+        self._outputs.append((entry["sha"], entry["tier"], bg_opt, fname))
+
+    def hit_rate(self):
+        total = sum(self.stats.values())
+        if total == 0:
+            return 0.0
+        return (self.stats["exact"] + self.stats["near"]) / total
@@ -0,0 +1,183 @@
+import torch
+import torch.nn as nn
+import torch.nn.functional as F
+from PIL import Image
+import numpy as np
+import io
+import os
+import segmentation_models_pytorch as smp
+import gdown   # for downloading model
+
+# --------------------------------------
+# MODEL DOWNLOAD + LOAD
+# --------------------------------------
+MODEL_PATH = "model.pth"  # safe filename
+DRIVE_URL = "https://drive.google.com/uc?export=download&id=18EbciqL5HdLzLo6SoM52VRE7nwfxDBtr"
+
+# --------------------------------------
+# RESOLUTION TIERS
+# working resolution the U-Net runs at; every tier is a
+# multiple of the encoder stride so no padding is needed,
+# other sizes are padded up and the mask cropped back
+# --------------------------------------
+STRIDE = 32
+TIERS = {
+    "Fast": 256,
+    "Balanced": 320,
+    "Standard": 384,
+    "Quality": 512,
+}
+DEFAULT_TIER = "Standard"
+DISPLAY_SIZE = 350
+THUMB_SIZE = 160
+
+BG_OPTIONS = ["Black","White","Steel Blue","Gradient","Pattern","Custom Image"]
+
+
+def download_model(path=MODEL_PATH):
+    if not os.path.exists(path):
+        print("Downloading model… please wait")
+        gdown.download(DRIVE_URL, path, quiet=False)
+    else:
+        print("Model already exists")
+
+
+def build_model(encoder_weights=None):
+    # build architecture
+    model = smp.Unet(
+        encoder_name="resnet101",
+        encoder_weights=encoder_weights,
+        in_channels=3,
+        classes=1,
+        activation=None
+    )
+
+    # extra mask refinement head
+    model.extra_head = nn.Sequential(
+        nn.Conv2d(1, 64, 3, padding=1),
+        nn.ReLU(),
+        nn.Conv2d(64, 32, 3, padding=1),
+        nn.ReLU(),
+        nn.Conv2d(32, 16, 3, padding=1),
+        nn.ReLU(),
+        nn.Conv2d(16, 1, 1)
+    )
+
+    # forward override
+    orig_forward = model.forward
+    def new_forward(x):
+        return model.extra_head(orig_forward(x))
+    model.forward = new_forward
+    return model
+
+
+def load_model(path=MODEL_PATH, device=None, random_weights=False, seed=0, mmap=False):
+    if device is None:
+        device = "cuda" if torch.cuda.is_available() else "cpu"
+
+    if random_weights:
+        # no checkpoint: seeded random init, used for benchmarks and tests
+        torch.manual_seed(seed)
+        model = build_model()
+    else:
+        download_model(path)
+        # encoder weights come from the checkpoint, skip the imagenet download
+        model = build_model()
+        # mmap=True keeps the weights as read-only file pages, shared
+        # by every process that maps the same checkpoint
+        state = torch.load(path, map_location=device, mmap=mmap)
+        model.load_state_dict(state, assign=mmap)
+
+    model.to(device)
+    model.eval()
+    return model, device
+
+# --------------------------------------
+# FUNCTIONS
+# --------------------------------------
+def open_image(data, max_side=None):
+    # JPEGs are decoded straight at a reduced scale when the
+    # full resolution isn't needed (draft is a no-op otherwise)
+    img = Image.open(io.BytesIO(data))
+    if max_side is not None:
+        img.draft("RGB", (max_side, max_side))
+    return img.convert("RGB")
+
+
+def tier_size(tier):
+    if isinstance(tier, int):
+        return tier
+    return TIERS[tier]
+
+
+def pad_to_stride(x, stride=STRIDE):
+    h, w = x.shape[-2:]
+    pad_h = (stride - h % stride) % stride
+    pad_w = (stride - w % stride) % stride
+    if pad_h or pad_w:
+        x = F.pad(x, (0, pad_w, 0, pad_h), mode="reflect")
+    return x, (h, w)
+
+
+def preprocess(img, size=TIERS[DEFAULT_TIER], device="cpu"):
+    img = img.convert("RGB").resize((size, size))
+    arr = np.asarray(img, dtype=np.float32) / 255.0
+    arr = torch.from_numpy(arr).permute(2,0,1).unsqueeze(0)
+    return arr.to(device)
+
+
+def predict_logits(model, x, out_size=None):
+    x, (h, w) = pad_to_stride(x)
+    with torch.no_grad():
+        logits = model(x)[..., :h, :w]
+        if out_size is not None and (h, w) != tuple(out_size):
+            logits = F.interpolate(logits, size=tuple(out_size), mode="bilinear", align_corners=False)
+    return logits
+
+
+def predict_mask(model, x, out_size=None):
+    pred = torch.sigmoid(predict_logits(model, x, out_size))
+    return (pred > 0.5).float()
+
+
+def make_bg(opt, h, w, custom=None):
+    if opt=="Black": bg = np.zeros((h, w, 3), dtype=np.float32)
+    elif opt=="White": bg = np.ones((h, w, 3), dtype=np.float32)
+    elif opt=="Steel Blue": bg = np.full((h, w, 3), [127/255,167/255,201/255], dtype=np.float32)
+    elif opt=="Gradient":
+        x = np.linspace(0,1,w, dtype=np.float32)
+        bg = np.stack([np.tile(x,(h,1))]*3, axis=2)
+    elif opt=="Pattern":
+        p = (np.indices((h,w)).sum(0) % 2).astype(np.float32)
+        bg = np.stack([p,p,p], axis=2)
+    elif opt=="Custom Image" and custom is not None:
+        bg = np.asarray(custom.convert("RGB").resize((w,h)), dtype=np.float32) / 255
+    else:
+        bg = np.zeros((h, w, 3), dtype=np.float32)
+    return bg
+
+
+def apply_bg(mask, img, opt, custom=None):
+    # select in uint8 with a broadcast (h, w, 1) mask: foreground pixels are
+    # the input bytes exactly, and no float64 or 3-channel mask copies are made
+    fg = mask.squeeze().cpu().numpy()[..., None] > 0.5
+    img_np = np.asarray(img)
+    bg = (make_bg(opt, img_np.shape[0], img_np.shape[1], custom) * 255).astype("uint8")
+    return np.where(fg, img_np, bg)
+
+
+def render_gallery(mask, img, opts=BG_OPTIONS, custom=None, size=THUMB_SIZE):
+    # every background at once: one (N, size, size, 3) composite,
+    # done at thumbnail size so it costs far less than N apply_bg calls
+    opts = [o for o in opts if o != "Custom Image" or custom is not None]
+    m = F.interpolate(mask.float().reshape(1, 1, *mask.shape[-2:]), size=(size, size), mode="nearest")
+    fg = m.squeeze().cpu().numpy()[None, ..., None] > 0.5
+    img_np = np.asarray(img.convert("RGB").resize((size, size)))[None]
+    bgs = (np.stack([make_bg(o, size, size, custom) for o in opts]) * 255).astype("uint8")
+
+    return opts, np.where(fg, img_np, bgs)
+
+
+def extract(model, img, tier=DEFAULT_TIER, device="cpu", out_size=(DISPLAY_SIZE, DISPLAY_SIZE)):
+    tensor = preprocess(img, tier_size(tier), device)
+    return predict_mask(model, tensor, out_size)
@@ -0,0 +1,102 @@
+import argparse
+import os
+import time
+import numpy as np
+import torch
+from PIL import Image
+
+from engine import TIERS, MODEL_PATH, load_model, preprocess, predict_mask
+
+# --------------------------------------
+# TIER EVALUATION
+# latency + IoU of every resolution tier against the
+# highest tier, on a local folder of images
+#
+#   python evaluate.py path/to/images
+# --------------------------------------
+VALID_EXT = (".png", ".jpg", ".jpeg")
+
+
+def iou(a, b):
+    a = a.bool()
+    b = b.bool()
+    union = (a | b).sum().item()
+    if union == 0:
+        return 1.0
+    return (a & b).sum().item() / union
+
+
+def list_images(folder):
+    return sorted(
+        os.path.join(folder, f) for f in os.listdir(folder)
+        if f.lower().endswith(VALID_EXT)
+    )
+
+
+def evaluate(model, device, paths, tiers, repeats=3):
+    ref_tier = max(tiers, key=lambda t: TIERS[t])
+    ref_size = TIERS[ref_tier]
+    out_size = (ref_size, ref_size)
+
+    latency = {t: [] for t in tiers}
+    scores = {t: [] for t in tiers}
+
+    for path in paths:
+        img = Image.open(path).convert("RGB")
+        masks = {}
+        for t in tiers:
+            x = preprocess(img, TIERS[t], device)
+            predict_mask(model, x, out_size)  # warm-up
+            times = []
+            for _ in range(repeats):
+                if device == "cuda":
+                    torch.cuda.synchronize()
+                start = time.perf_counter()
+                masks[t] = predict_mask(model, x, out_size)
+                if device == "cuda":
+                    torch.cuda.synchronize()
+                times.append(time.perf_counter() - start)
+            latency[t].append(min(times))
+        for t in tiers:
+            scores[t].append(iou(masks[t], masks[ref_tier]))
+
+    rows = []
+    for t in sorted(tiers, key=lambda t: TIERS[t]):
+        rows.append({
+            "tier": t,
+            "size": TIERS[t],
+            "latency_ms": 1000 * float(np.mean(latency[t])),
+            "iou": float(np.mean(scores[t])),
+        })
+    return ref_tier, rows
+
+
+def print_table(ref_tier, rows):
+    print(f"{'tier':<10}{'size':>6}{'latency ms':>14}{'IoU vs ' + ref_tier:>20}")
+    for r in rows:
+        print(f"{r['tier']:<10}{r['size']:>6}{r['latency_ms']:>14.1f}{r['iou']:>20.4f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Speed/accuracy table for the resolution tiers")
+    parser.add_argument("images", help="folder of images to evaluate on")
+    parser.add_argument("--tiers", nargs="+", default=list(TIERS), choices=list(TIERS))
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--weights", default=MODEL_PATH)
+    parser.add_argument("--random-weights", action="store_true",
+                        help="skip the checkpoint, latency numbers only")
+    parser.add_argument("--device", default=None)
+    args = parser.parse_args()
+
+    paths = list_images(args.images)
+    if not paths:
+        parser.error(f"no images found in {args.images}")
+
+    model, device = load_model(args.weights, args.device, random_weights=args.random_weights)
+    ref_tier, rows = evaluate(model, device, paths, args.tiers, args.repeats)
+    print(f"{len(paths)} images, device={device}")
+    print_table(ref_tier, rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,183 @@
+import argparse
+import datetime
+import os
+import sys
+import tarfile
+import tempfile
+import time
+import zipfile
+
+# --------------------------------------
+# HISTORY EXPORT
+# streams history images into a ZIP or tar archive chunk by
+# chunk: files are read from disk in CHUNK_SIZE pieces, stored
+# as-is (no PNG re-encoding, no recompression) and the archive
+# is never held in memory
+#
+# the History page writes archives under static/exports/ and
+# links them through Streamlit's static file server, which
+# streams them from disk (max STATIC_MAX_BYTES); archives
+# older than EXPORT_TTL are pruned on the next export
+#
+#   python history_export.py --since 2026-01-01 --out history.zip
+#   python history_export.py --page 2 --format tar --out - > page2.tar
+# --------------------------------------
+HISTORY_DIR = "history"
+VALID_EXT = (".png", ".jpg", ".jpeg")
+PAGE_SIZE = 30
+CHUNK_SIZE = 1 << 20
+
+EXPORT_DIR = os.path.join("static", "exports")   # served at app/static/exports/
+EXPORT_TTL = 3600                                # seconds an archive stays available
+STATIC_MAX_BYTES = 200 << 20                     # Streamlit refuses larger static files
+
+
+def list_history(history_dir=HISTORY_DIR):
+    # same order as the History page grid
+    files = sorted(os.listdir(history_dir), reverse=True) if os.path.isdir(history_dir) else []
+    return [f for f in files if f.lower().endswith(VALID_EXT)]
+
+
+def page_count(files, page_size=PAGE_SIZE):
+    return max(1, -(-len(files) // page_size))
+
+
+def select_entries(history_dir=HISTORY_DIR, since=None, until=None, page=None, page_size=PAGE_SIZE):
+    # since / until: datetime.date, inclusive, matched on modification time
+    files = list_history(history_dir)
+    if page is not None:
+        files = files[(page - 1) * page_size : page * page_size]
+
+    paths = []
+    for f in files:
+        path = os.path.join(history_dir, f)
+        day = datetime.date.fromtimestamp(os.path.getmtime(path))
+        if since is not None and day < since:
+            continue
+        if until is not None and day > until:
+            continue
+        paths.append(path)
+    return paths
+
+
+def _read_chunks(path, chunk_size=CHUNK_SIZE):
+    with open(path, "rb") as f:
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                break
+            yield chunk
+
+
+class _Sink:
+    # write-only stream; zipfile falls back to data descriptors
+    # because there is no tell()/seek()
+    def __init__(self):
+        self.parts = []
+
+    def write(self, b):
+        self.parts.append(bytes(b))
+        return len(b)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b"".join(self.parts)
+        self.parts.clear()
+        return data
+
+
+def iter_zip(paths, chunk_size=CHUNK_SIZE):
+    sink = _Sink()
+    with zipfile.ZipFile(sink, "w", compression=zipfile.ZIP_STORED) as zf:
+        for path in paths:
+            info = zipfile.ZipInfo(os.path.basename(path),
+                                   time.localtime(os.path.getmtime(path))[:6])
+            info.compress_type = zipfile.ZIP_STORED
+            with zf.open(info, "w", force_zip64=True) as dst:
+                for chunk in _read_chunks(path, chunk_size):
+                    dst.write(chunk)
+                    yield sink.drain()
+            yield sink.drain()
+    yield sink.drain()
+
+
+def iter_tar(paths, chunk_size=CHUNK_SIZE):
+    for path in paths:
+        st = os.stat(path)
+        info = tarfile.TarInfo(os.path.basename(path))
+        info.size = st.st_size
+        info.mtime = int(st.st_mtime)
+        info.mode = 0o644
+        yield info.tobuf(tarfile.PAX_FORMAT)
+        for chunk in _read_chunks(path, chunk_size):
+            yield chunk
+        pad = -info.size % tarfile.BLOCKSIZE
+        if pad:
+            yield tarfile.NUL * pad
+    yield tarfile.NUL * (2 * tarfile.BLOCKSIZE)
+
+
+FORMATS = {"zip": iter_zip, "tar": iter_tar}
+
+
+def write_archive(paths, out, fmt="zip"):
+    # out: path, or a binary file object (e.g. sys.stdout.buffer)
+    if isinstance(out, str):
+        with open(out, "wb") as f:
+            return write_archive(paths, f, fmt)
+    total = 0
+    for chunk in FORMATS[fmt](paths):
+        if chunk:
+            out.write(chunk)
+            total += len(chunk)
+    return total
+
+
+def new_export_path(export_dir=EXPORT_DIR, fmt="zip"):
+    # static files are public: use an unguessable name
+    os.makedirs(export_dir, exist_ok=True)
+    fd, path = tempfile.mkstemp(prefix=f"history_{time.strftime('%Y%m%d-%H%M%S')}_",
+                                suffix=f".{fmt}", dir=export_dir)
+    os.close(fd)
+    return path
+
+
+def prune_exports(export_dir=EXPORT_DIR, max_age=EXPORT_TTL):
+    removed = []
+    if not os.path.isdir(export_dir):
+        return removed
+    cutoff = time.time() - max_age
+    for f in os.listdir(export_dir):
+        path = os.path.join(export_dir, f)
+        if f.endswith(tuple(f".{fmt}" for fmt in FORMATS)) and os.path.getmtime(path) < cutoff:
+            try:
+                os.remove(path)
+            except FileNotFoundError:   # pruned by another session
+                continue
+            removed.append(path)
+    return removed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export history images into a ZIP or tar archive")
+    parser.add_argument("--since", type=datetime.date.fromisoformat, default=None, help="YYYY-MM-DD")
+    parser.add_argument("--until", type=datetime.date.fromisoformat, default=None, help="YYYY-MM-DD")
+    parser.add_argument("--page", type=int, default=None, help=f"History page ({PAGE_SIZE} images per page)")
+    parser.add_argument("--format", default="zip", choices=list(FORMATS))
+    parser.add_argument("--out", default=None, help="archive path, - for stdout")
+    parser.add_argument("--history", default=HISTORY_DIR)
+    args = parser.parse_args()
+
+    paths = select_entries(args.history, args.since, args.until, args.page)
+    out = args.out or f"history_export.{args.format}"
+    if out == "-":
+        write_archive(paths, sys.stdout.buffer, args.format)
+    else:
+        size = write_archive(paths, out, args.format)
+        print(f"{len(paths)} images, {size / 2**20:.1f} MB written to {out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,210 @@
+import argparse
+import functools
+import hashlib
+import io
+import os
+import shutil
+import tempfile
+import threading
+import time
+import traceback
+from unittest import mock
+from unittest.mock import MagicMock
+import numpy as np
+from PIL import Image
+import streamlit as st
+from streamlit.runtime import Runtime
+from streamlit.runtime.caching.storage.dummy_cache_storage import MemoryCacheStorageManager
+from streamlit.runtime.media_file_manager import MediaFileManager
+from streamlit.runtime.memory_media_file_storage import MemoryMediaFileStorage
+from streamlit.testing.v1 import AppTest
+
+import engine
+from membudget import RssSampler
+
+# --------------------------------------
+# LOAD TEST
+# drives N concurrent sessions through the real app scripts
+# with Streamlit's AppTest, sharing one @st.cache_resource
+# model with random weights, and reports throughput, latency
+# percentiles, peak RSS and errors per scenario; each scenario
+# starts from an empty history/ with its own images, so no
+# scenario measures another one's duplicate-detection hits
+#
+#   python loadtest.py --sessions 20 --iterations 3
+# --------------------------------------
+ROOT = os.path.dirname(os.path.abspath(__file__))
+APP = os.path.join(ROOT, "app.py")
+HISTORY_PAGE = os.path.join(ROOT, "pages", "history.py")
+
+UPLOAD_LABEL = "Upload your image"
+UPLOAD_KEY = "_loadtest_upload"   # session_state slot the fake uploader reads
+
+SCENARIOS = {
+    "extract": ["load", "extract"],
+    "full": ["load", "extract", "background", "history"],
+}
+
+
+class FakeUpload(io.BytesIO):
+    def __init__(self, data):
+        super().__init__(data)
+        self.file_id = hashlib.sha1(data).hexdigest()
+        self.name = "upload.png"
+        self.type = "image/png"
+        self.size = len(data)
+
+
+_real_uploader = st.file_uploader
+
+
+def _fake_uploader(label, *args, **kwargs):
+    # AppTest cannot drive file_uploader, so the upload comes from session_state
+    real = _real_uploader(label, *args, **kwargs)
+    data = st.session_state.get(UPLOAD_KEY) if label == UPLOAD_LABEL else None
+    return FakeUpload(data) if data is not None else real
+
+
+def shared_runtime():
+    # AppTest.run() installs a mock Runtime process-wide and clears it
+    # when it finishes, which breaks sessions still running; all
+    # sessions get this one instead
+    rt = MagicMock(spec=Runtime)
+    rt.media_file_mgr = MediaFileManager(MemoryMediaFileStorage("/mock/media"))
+    rt.cache_storage_manager = MemoryCacheStorageManager()
+    return rt
+
+
+def random_image(rng, size=512):
+    arr = rng.integers(0, 256, (size, size, 3), dtype=np.uint8)
+    buf = io.BytesIO()
+    Image.fromarray(arr).save(buf, format="PNG")
+    return buf.getvalue()
+
+
+def run_step(step, state, image, timeout):
+    if step == "load":
+        state["app"] = AppTest.from_file(APP, default_timeout=timeout).run()
+        at = state["app"]
+    elif step == "extract":
+        at = state["app"]
+        at.session_state[UPLOAD_KEY] = image
+        at.run()
+    elif step == "background":
+        at = state["app"]
+        box = next(s for s in at.selectbox if s.label == "Select Background")
+        box.select("White").run()
+    elif step == "history":
+        at = AppTest.from_file(HISTORY_PAGE, default_timeout=timeout).run()
+    else:
+        raise ValueError(f"unknown step {step}")
+
+    if at.exception:
+        raise RuntimeError(at.exception[0].message)
+
+
+def session(steps, images, timeout, latencies, errors, lock):
+    for image in images:
+        state = {}
+        for step in steps:
+            start = time.perf_counter()
+            try:
+                run_step(step, state, image, timeout)
+            except Exception:
+                with lock:
+                    errors[step].append(traceback.format_exc(limit=1))
+                break
+            finally:
+                with lock:
+                    latencies[step].append(time.perf_counter() - start)
+
+
+def run_scenario(name, sessions, iterations, repeat_images, timeout, seed=0):
+    steps = SCENARIOS[name]
+    rng = np.random.default_rng(seed)
+    shared = [random_image(rng)] if repeat_images else None
+
+    latencies = {s: [] for s in steps}
+    errors = {s: [] for s in steps}
+    lock = threading.Lock()
+
+    threads = []
+    for _ in range(sessions):
+        images = shared * iterations if shared else [random_image(rng) for _ in range(iterations)]
+        threads.append(threading.Thread(target=session,
+                                        args=(steps, images, timeout, latencies, errors, lock)))
+
+    sampler = RssSampler()
+    sampler.start()
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+    sampler.stop()
+
+    return {
+        "scenario": name,
+        "sessions": sessions,
+        "elapsed": elapsed,
+        "throughput": sessions * iterations / elapsed,
+        "peak_rss_mb": sampler.peak / 2**20,
+        "steps": {
+            s: {
+                "count": len(latencies[s]),
+                "p50": 1000 * float(np.percentile(latencies[s], 50)) if latencies[s] else 0.0,
+                "p95": 1000 * float(np.percentile(latencies[s], 95)) if latencies[s] else 0.0,
+                "p99": 1000 * float(np.percentile(latencies[s], 99)) if latencies[s] else 0.0,
+                "errors": len(errors[s]),
+                "first_error": errors[s][0] if errors[s] else None,
+            }
+            for s in steps
+        },
+    }
+
+
+def print_report(r):
+    print(f"\n== {r['scenario']}: {r['sessions']} sessions, {r['elapsed']:.1f}s, "
+          f"{r['throughput']:.2f} flows/s, peak RSS {r['peak_rss_mb']:.0f} MB")
+    print(f"{'step':<12}{'count':>7}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'errors':>8}")
+    for step, s in r["steps"].items():
+        print(f"{step:<12}{s['count']:>7}{s['p50']:>10.1f}{s['p95']:>10.1f}{s['p99']:>10.1f}{s['errors']:>8}")
+        if s["first_error"]:
+            print("    " + s["first_error"].strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrent-session load test for the Streamlit app")
+    parser.add_argument("--sessions", type=int, default=20)
+    parser.add_argument("--iterations", type=int, default=3, help="flows per session")
+    parser.add_argument("--scenarios", nargs="+", default=list(SCENARIOS), choices=list(SCENARIOS))
+    parser.add_argument("--repeat-images", action="store_true",
+                        help="every session uploads the same image (exercises duplicate detection)")
+    parser.add_argument("--timeout", type=float, default=120)
+    args = parser.parse_args()
+
+    # the app reads assets/ and writes history/ relative to the cwd
+    workdir = tempfile.mkdtemp(prefix="visionextract-load-")
+    shutil.copytree(os.path.join(ROOT, "assets"), os.path.join(workdir, "assets"))
+    cwd = os.getcwd()
+    os.chdir(workdir)
+
+    random_model = functools.partial(engine.load_model, random_weights=True)
+    try:
+        rt = shared_runtime()
+        with mock.patch("engine.load_model", random_model), \
+             mock.patch("streamlit.file_uploader", _fake_uploader), \
+             mock.patch.object(Runtime, "instance", lambda: rt), \
+             mock.patch.object(Runtime, "exists", lambda: True):
+            for seed, name in enumerate(args.scenarios):
+                shutil.rmtree(os.path.join(workdir, "history"), ignore_errors=True)
+                print_report(run_scenario(name, args.sessions, args.iterations,
+                                          args.repeat_images, args.timeout, seed))
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
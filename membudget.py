@@ -0,0 +1,144 @@
+import contextlib
+import logging
+import os
+import resource
+import threading
+import time
+
+# --------------------------------------
+# MEMORY BUDGET
+# each request reserves its estimated footprint before it
+# runs; requests that don't fit wait until others finish,
+# so bursts queue instead of pushing the pod into an OOM kill
+#
+#   VISIONEXTRACT_MEMORY_BUDGET_MB=1500 streamlit run app.py
+#
+# 0 (default) means unlimited, only accounting is done; the
+# per-request report goes to stderr at INFO (quiet it with
+# VISIONEXTRACT_LOG_LEVEL=WARNING) and under the app's output
+#
+# the peak RSS reported per request is the whole process's:
+# requests overlapping it are included (the log line says how
+# many were in flight), and with VISIONEXTRACT_WORKERS > 0 the
+# inference memory lives in the worker processes, so neither
+# the reservation nor the peak covers it
+# --------------------------------------
+MEMORY_BUDGET_MB = int(os.environ.get("VISIONEXTRACT_MEMORY_BUDGET_MB", "0"))
+
+# peak RSS growth of a cold (first-in-process) U-Net + extra_head
+# forward under no_grad, per input pixel: measured up to ~1.5 KB
+# at 512 px and ~2.2 KB at 256 px, where fixed allocator and
+# thread-pool overhead weighs more; warm requests need about half
+ACTIVATION_BYTES_PER_PIXEL = 2560
+MB = 2**20
+
+# Streamlit only configures its own loggers, so this one gets a handler
+logger = logging.getLogger(__name__)
+logger.setLevel(os.environ.get("VISIONEXTRACT_LOG_LEVEL", "INFO").upper())
+if not logger.handlers:
+    _handler = logging.StreamHandler()
+    _handler.setFormatter(logging.Formatter("%(asctime)s %(name)s %(levelname)s %(message)s"))
+    logger.addHandler(_handler)
+    logger.propagate = False
+
+
+def current_rss():
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+class RssSampler(threading.Thread):
+    def __init__(self, interval=0.05):
+        super().__init__(daemon=True)
+        self.interval = interval
+        self.start_rss = current_rss()
+        self.peak = self.start_rss
+        self._done = threading.Event()
+
+    def run(self):
+        while not self._done.is_set():
+            self.peak = max(self.peak, current_rss())
+            self._done.wait(self.interval)
+
+    def stop(self):
+        self._done.set()
+        self.join()
+        self.peak = max(self.peak, current_rss())
+
+
+def estimate_request_bytes(src_size, tier_px, display_px, batch=1):
+    w, h = src_size
+    upload = w * h * 3                                    # decoded RGB upload
+    tensor = batch * 3 * tier_px * tier_px * 4            # float32 input
+    activations = batch * tier_px * tier_px * ACTIVATION_BYTES_PER_PIXEL
+    display = display_px * display_px
+    post = display * (4 + 3 * 4 * 3 + 3)                  # mask, float32 img/bg/out, uint8 out
+    encoded = display * 3 * 2                             # PNG buffer + base64
+    return upload + tensor + activations + post + encoded
+
+
+def max_batch_size(tier_px, budget_mb=MEMORY_BUDGET_MB, requested=8):
+    if budget_mb <= 0:
+        return requested
+    per_frame = estimate_request_bytes((tier_px, tier_px), tier_px, tier_px)
+    return max(1, min(requested, int(budget_mb * MB // per_frame)))
+
+
+class MemoryBudget:
+    def __init__(self, budget_mb=MEMORY_BUDGET_MB):
+        self.budget = budget_mb * MB
+        self.reserved = 0
+        self._cond = threading.Condition()
+        self._active = []   # stats of the requests in flight
+
+    def _acquire(self, nbytes):
+        if self.budget <= 0:
+            return
+        with self._cond:
+            # a request bigger than the whole budget runs alone
+            while self.reserved > 0 and self.reserved + nbytes > self.budget:
+                self._cond.wait()
+            self.reserved += nbytes
+
+    def _release(self, nbytes):
+        if self.budget <= 0:
+            return
+        with self._cond:
+            self.reserved -= nbytes
+            self._cond.notify_all()
+
+    @contextlib.contextmanager
+    def request(self, nbytes, name="request"):
+        waited = time.perf_counter()
+        self._acquire(nbytes)
+        waited = time.perf_counter() - waited
+
+        stats = {"estimate_mb": nbytes / MB, "wait_s": waited, "max_in_flight": 1}
+        with self._cond:
+            self._active.append(stats)
+            for s in self._active:
+                s["max_in_flight"] = max(s["max_in_flight"], len(self._active))
+
+        sampler = RssSampler()
+        sampler.start()
+        try:
+            yield stats
+        finally:
+            sampler.stop()
+            with self._cond:
+                self._active.remove(stats)
+            self._release(nbytes)
+            stats["start_rss_mb"] = sampler.start_rss / MB
+            stats["peak_rss_mb"] = sampler.peak / MB
+            stats["delta_mb"] = (sampler.peak - sampler.start_rss) / MB
+            logger.info("%s: estimate %.0f MB, process peak RSS %.0f MB (+%.0f) "
+                        "with up to %d requests in flight, waited %.2fs",
+                        name, stats["estimate_mb"], stats["peak_rss_mb"], stats["delta_mb"],
+                        stats["max_in_flight"], waited)
+
+
+# one budget per process, shared by every Streamlit session
+BUDGET = MemoryBudget()
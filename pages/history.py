@@ -1,8 +1,9 @@
 import streamlit as st
 import os
 from PIL import Image, UnidentifiedImageError
-import base64
-from io import BytesIO
+import datetime
+from history_export import (list_history, page_count, select_entries, write_archive, new_export_path,
+                            prune_exports, PAGE_SIZE, FORMATS, EXPORT_DIR, STATIC_MAX_BYTES)
 
 # ----------------------------------------------------
 # PAGE CONFIG
@@ -102,6 +103,19 @@ st.markdown(f"""
   transform: translateY(-2px);
 }}
 
+/* Archive link, looks like the download buttons */
+a.export-link {{
+  display:inline-block;
+  background-color: #3498DB;
+  color: #FFFFFF !important;
+  padding: 8px 22px;
+  border-radius: 25px;
+  font-weight:700;
+  text-decoration: none !important;
+  box-shadow: 0 4px 10px rgba(0,0,0,0.12);
+}}
+a.export-link:hover {{ background-color: #1F78C8; }}
+
 /* Make sure links in navbar have no underline */
 .topmenu a {{ text-decoration: none !important; }}
 
@@ -132,14 +146,60 @@ st.write(" ")
 HISTORY_DIR = "history"
 os.makedirs(HISTORY_DIR, exist_ok=True)
 
-files = sorted(os.listdir(HISTORY_DIR), reverse=True)
-valid_ext = (".png", ".jpg", ".jpeg")
-image_files = [f for f in files if f.lower().endswith(valid_ext)]
+image_files = list_history(HISTORY_DIR)
 
 if len(image_files) == 0:
     st.info("No images saved in history yet.")
     st.stop()
 
+# ----------------------------------------------------
+# PAGINATION
+# ----------------------------------------------------
+pages = page_count(image_files)
+page = st.number_input(f"Page (of {pages})", min_value=1, max_value=pages, value=1, step=1)
+
+# ----------------------------------------------------
+# BULK EXPORT
+# archive is streamed to static/exports/ chunk by chunk from
+# disk and served by Streamlit's static file server (needs
+# server.enableStaticServing), never loaded into this process
+# ----------------------------------------------------
+with st.expander("Bulk Export"):
+    scope = st.radio("Images", ["This page", "Date range", "All"], horizontal=True)
+    since = until = None
+    if scope == "Date range":
+        today = datetime.date.today()
+        rng = st.date_input("Saved between", (today - datetime.timedelta(days=7), today))
+        if rng:
+            # a single picked day is a one-day range
+            since, until = rng[0], rng[-1]
+    fmt = st.radio("Format", list(FORMATS), horizontal=True)
+    no_range = scope == "Date range" and since is None
+
+    if st.button("Build Archive", key="export_build", disabled=no_range):
+        paths = select_entries(HISTORY_DIR, since, until,
+                               page=page if scope == "This page" else None)
+        if not paths:
+            st.warning("No images match this selection.")
+        else:
+            prune_exports()
+            out = new_export_path(EXPORT_DIR, fmt)
+            size = write_archive(paths, out, fmt)
+            if size > STATIC_MAX_BYTES:
+                os.remove(out)
+                st.session_state.pop("export_path", None)
+                st.error(f"Archive is {size / 2**20:.0f} MB, over the {STATIC_MAX_BYTES >> 20} MB "
+                         "download limit. Narrow the selection or use `python history_export.py`.")
+            else:
+                st.session_state["export_path"] = out
+                st.success(f"{len(paths)} images, {size / 2**20:.1f} MB")
+
+    out = st.session_state.get("export_path")
+    if out and os.path.exists(out):
+        name = os.path.basename(out)
+        st.markdown(f"<a class='export-link' href='app/static/exports/{name}' download='{name}'>"
+                    "Download Archive</a>", unsafe_allow_html=True)
+
 # ----------------------------------------------------
 # Show images in 3-column grid
 # For each image: show image, filename, download (st.download_button), delete (st.button)
@@ -147,7 +207,7 @@ if len(image_files) == 0:
 cols = st.columns(3)
 idx = 0
 
-for fname in image_files:
+for fname in image_files[(page - 1) * PAGE_SIZE : page * PAGE_SIZE]:
     path = os.path.join(HISTORY_DIR, fname)
 
     try:
@@ -164,10 +224,9 @@ for fname in image_files:
         # Filename
         st.markdown(f"<div class='filename'>{fname}</div>", unsafe_allow_html=True)
 
-        # Prepare image bytes for download
-        buf = BytesIO()
-        img.save(buf, format="PNG")
-        byte_data = buf.getvalue()
+        # File bytes as stored, no re-encoding
+        with open(path, "rb") as f:
+            byte_data = f.read()
 
         # Buttons: use two small columns to align side-by-side reliably
         col_dl, col_del = st.columns([1,1])
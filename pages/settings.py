@@ -3,6 +3,7 @@ from PIL import Image, ImageEnhance, ImageFilter
 import io
 import os
 import base64
+from dedup import HistoryIndex, DEFAULT_THRESHOLD
 
 # -----------------------------------------------------
 # PAGE CONFIG
@@ -100,6 +101,23 @@ st.markdown(f"""
 st.markdown(f"<h1 style='text-align:center; color:{TEXT};'>Image Adjustment Settings</h1>", unsafe_allow_html=True)
 st.write(" ")
 
+# -----------------------------------------------------
+# DUPLICATE DETECTION
+# -----------------------------------------------------
+with st.expander("Duplicate Detection"):
+    st.session_state["dedup_threshold"] = st.slider(
+        "Near-duplicate threshold (differing hash bits, 0 = exact only)",
+        0, 16, st.session_state.get("dedup_threshold", DEFAULT_THRESHOLD))
+
+    index = HistoryIndex()
+    stats = index.stats
+    hit_rate = index.hit_rate()
+    s1, s2, s3, s4 = st.columns(4)
+    s1.metric("Exact hits", stats["exact"])
+    s2.metric("Near hits", stats["near"])
+    s3.metric("Misses", stats["miss"])
+    s4.metric("Hit rate", f"{hit_rate:.0%}")
+
 # -----------------------------------------------------
 # LOAD LATEST IMAGE
 # -----------------------------------------------------
@@ -0,0 +1,132 @@
+import argparse
+import contextlib
+import itertools
+import os
+import random
+import threading
+import time
+import torch
+from torch.profiler import profile, record_function, ProfilerActivity
+from PIL import Image
+
+from engine import TIERS, DEFAULT_TIER, DISPLAY_SIZE, MODEL_PATH, load_model, preprocess, predict_mask, apply_bg
+
+# --------------------------------------
+# REQUEST PROFILING
+# wraps one request in torch.profiler and writes a Chrome /
+# Perfetto trace plus an operator summary table; encoder,
+# decoder and extra_head blocks are labelled in the trace
+#
+# enabled per request (?profile=1 in the app URL) or for a
+# sampled fraction via VISIONEXTRACT_PROFILE_RATE=0.01;
+# when not enabled nothing is wrapped or hooked; the block
+# hooks sit on the shared model but only act on the thread
+# that is being profiled, so other sessions are unaffected
+#
+#   python profiling.py photo.jpg --tier Quality
+# --------------------------------------
+PROFILE_DIR = "profiles"
+PROFILE_RATE = float(os.environ.get("VISIONEXTRACT_PROFILE_RATE", "0"))
+SUMMARY_ROWS = 40
+
+_trace_ids = itertools.count(1)   # keeps same-second traces apart
+
+
+def should_profile(enabled=False, rate=PROFILE_RATE):
+    return enabled or (rate > 0 and random.random() < rate)
+
+
+def stage(prof, name):
+    # labels a pre/post-processing step; a no-op outside a profiled request
+    return record_function(name) if prof is not None else contextlib.nullcontext()
+
+
+def _model_blocks(model):
+    # top-level parts (encoder, decoder, segmentation_head, extra_head)
+    # and their direct children (encoder.layer1, decoder.blocks, ...)
+    for name, mod in model.named_children():
+        yield name, mod
+        for child, sub in mod.named_children():
+            yield f"{name}.{child}", sub
+
+
+def _label_blocks(model):
+    # only the profiled thread pushes and pops, so one stack is enough
+    owner = threading.get_ident()
+    scopes = []
+    handles = []
+    for name, mod in _model_blocks(model):
+
+        def pre(m, inp, name=name):
+            if threading.get_ident() != owner:
+                return
+            scope = record_function(name)
+            scope.__enter__()
+            scopes.append(scope)
+
+        def post(m, inp, out):
+            if threading.get_ident() != owner or not scopes:
+                return
+            scopes.pop().__exit__(None, None, None)
+
+        handles.append(mod.register_forward_pre_hook(pre))
+        handles.append(mod.register_forward_hook(post))
+    return handles
+
+
+@contextlib.contextmanager
+def profile_request(model=None, name="request", enabled=False, rate=PROFILE_RATE, out_dir=PROFILE_DIR):
+    if not should_profile(enabled, rate):
+        yield None
+        return
+
+    activities = [ProfilerActivity.CPU]
+    if torch.cuda.is_available():
+        activities.append(ProfilerActivity.CUDA)
+
+    handles = _label_blocks(model) if model is not None else []
+    try:
+        with profile(activities=activities, record_shapes=True) as prof:
+            yield prof
+    finally:
+        for h in handles:
+            h.remove()
+
+    os.makedirs(out_dir, exist_ok=True)
+    base = os.path.join(out_dir, f"{time.strftime('%Y%m%d-%H%M%S')}_{name}_{os.getpid()}-{next(_trace_ids)}")
+    prof.export_chrome_trace(base + ".json")
+    sort_by = "self_cuda_time_total" if torch.cuda.is_available() else "self_cpu_time_total"
+    with open(base + ".txt", "w") as f:
+        f.write(prof.key_averages().table(sort_by=sort_by, row_limit=SUMMARY_ROWS))
+    print(f"profile written to {base}.json / .txt")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Profile one extraction and write a trace")
+    parser.add_argument("image")
+    parser.add_argument("--tier", default=DEFAULT_TIER, choices=list(TIERS))
+    parser.add_argument("--bg", default="Black")
+    parser.add_argument("--out", default=PROFILE_DIR)
+    parser.add_argument("--weights", default=MODEL_PATH)
+    parser.add_argument("--random-weights", action="store_true")
+    args = parser.parse_args()
+
+    model, device = load_model(args.weights, random_weights=args.random_weights)
+    src = Image.open(args.image).convert("RGB")
+    img = src.resize((DISPLAY_SIZE, DISPLAY_SIZE))
+
+    # warm-up so one-time allocations don't dominate the trace
+    predict_mask(model, preprocess(src, TIERS[args.tier], device))
+
+    with profile_request(model, os.path.splitext(os.path.basename(args.image))[0],
+                         enabled=True, out_dir=args.out) as prof:
+        with stage(prof, "preprocess"):
+            tensor = preprocess(src, TIERS[args.tier], device)
+        with stage(prof, "predict_mask"):
+            mask = predict_mask(model, tensor, (DISPLAY_SIZE, DISPLAY_SIZE))
+        with stage(prof, "apply_bg"):
+            Image.fromarray(apply_bg(mask, img, args.bg))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+import os
+import numpy as np
+import pytest
+import torch
+from PIL import Image
+
+from engine import load_model
+
+# --------------------------------------
+# SHARED FIXTURES
+# every test runs against the real architecture from
+# load_model with seeded random weights (no download)
+#
+# golden files live in tests/golden/; after an intended
+# output change regenerate them with
+#   UPDATE_GOLDEN=1 python -m pytest
+# --------------------------------------
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+GOLDEN_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "golden")
+UPDATE_GOLDEN = os.environ.get("UPDATE_GOLDEN") == "1"
+SEED = 0
+
+
+@pytest.fixture(scope="session")
+def model():
+    torch.set_num_threads(max(1, min(4, os.cpu_count() or 1)))
+    model, _ = load_model(device="cpu", random_weights=True, seed=SEED)
+    return model
+
+
+@pytest.fixture(scope="session")
+def sample():
+    return Image.open(os.path.join(ROOT, "assets", "image19.jpeg")).convert("RGB")
+
+
+@pytest.fixture(scope="session")
+def custom_bg():
+    return Image.open(os.path.join(ROOT, "assets", "extracted.png"))
+
+
+@pytest.fixture(scope="session")
+def circle_mask():
+    # circle_mask(size) -> (1, 1, size, size) float mask of a centred disc
+    def make(size):
+        yy, xx = np.mgrid[:size, :size]
+        inside = (yy - size / 2) ** 2 + (xx - size / 2) ** 2 < (size / 3) ** 2
+        return torch.from_numpy(inside.astype(np.float32))[None, None]
+    return make
+
+
+@pytest.fixture
+def golden():
+    # golden(name, **arrays) -> stored arrays (written first when updating)
+    def load(name, **arrays):
+        path = os.path.join(GOLDEN_DIR, name + ".npz")
+        if UPDATE_GOLDEN:
+            os.makedirs(GOLDEN_DIR, exist_ok=True)
+            np.savez_compressed(path, **arrays)
+        if not os.path.exists(path):
+            pytest.fail(f"missing golden file {path}; run UPDATE_GOLDEN=1 python -m pytest")
+        with np.load(path) as data:
+            return {k: data[k] for k in data.files}
+    return load
@@ -0,0 +1,101 @@
+import os
+import time
+import tracemalloc
+import pytest
+import torch
+
+from engine import TIERS, DISPLAY_SIZE, preprocess, predict_mask, apply_bg, render_gallery
+from membudget import RssSampler, ACTIVATION_BYTES_PER_PIXEL, MB
+
+# --------------------------------------
+# PERFORMANCE BUDGETS
+# per-stage latency (best of N, ms) and peak allocation (MB);
+# a change that blows one fails here instead of in production.
+# latency budgets are for a machine that runs the reference
+# conv in REFERENCE_MS and stretch on slower ones; they are
+# marked perf, so noisy runners can skip them with
+#   python -m pytest -m "not perf"
+# or loosen them further with VISIONEXTRACT_BUDGET_SCALE=3
+# --------------------------------------
+SCALE = float(os.environ.get("VISIONEXTRACT_BUDGET_SCALE", "1"))
+REFERENCE_MS = 4
+
+LATENCY_MS = {
+    "preprocess": 20,
+    "predict_mask": 2000,    # Fast tier, CPU
+    "apply_bg": 20,
+    "render_gallery": 30,
+}
+
+ALLOC_MB = {
+    "preprocess": 2,
+    "apply_bg": 4,           # uint8 select at 350x350 (~2.3); the float64 version needs ~15
+    "render_gallery": 8,
+}
+
+
+def best_ms(fn, repeats=5):
+    fn()
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return 1000 * min(times)
+
+
+@pytest.fixture(scope="module")
+def speed_factor():
+    # >1 on machines slower than the one the budgets were set on
+    x, w = torch.rand(1, 64, 64, 64), torch.rand(64, 64, 3, 3)
+    ms = best_ms(lambda: torch.nn.functional.conv2d(x, w, padding=1), 10)
+    return max(1.0, ms / REFERENCE_MS) * SCALE
+
+
+def peak_alloc_mb(fn):
+    tracemalloc.start()
+    try:
+        fn()
+        return tracemalloc.get_traced_memory()[1] / MB
+    finally:
+        tracemalloc.stop()
+
+
+@pytest.fixture(scope="module")
+def stages(model, sample, custom_bg, circle_mask):
+    img = sample.resize((DISPLAY_SIZE, DISPLAY_SIZE))
+    x = preprocess(sample, TIERS["Fast"])
+    mask = circle_mask(DISPLAY_SIZE)
+    return {
+        "preprocess": lambda: preprocess(sample, TIERS["Fast"]),
+        "predict_mask": lambda: predict_mask(model, x, (DISPLAY_SIZE, DISPLAY_SIZE)),
+        "apply_bg": lambda: apply_bg(mask, img, "Custom Image", custom_bg),
+        "render_gallery": lambda: render_gallery(mask, img, custom=custom_bg),
+    }
+
+
+@pytest.mark.perf
+@pytest.mark.parametrize("stage", list(LATENCY_MS))
+def test_latency_budget(stages, speed_factor, stage):
+    repeats = 2 if stage == "predict_mask" else 5
+    ms = best_ms(stages[stage], repeats)
+    budget = LATENCY_MS[stage] * speed_factor
+    assert ms <= budget, f"{stage}: {ms:.1f} ms > {budget:.0f} ms"
+
+
+@pytest.mark.parametrize("stage", list(ALLOC_MB))
+def test_allocation_budget(stages, stage):
+    mb = peak_alloc_mb(stages[stage])
+    assert mb <= ALLOC_MB[stage], f"{stage}: peak {mb:.1f} MB > {ALLOC_MB[stage]} MB"
+
+
+def test_inference_rss_within_estimate(model, sample):
+    # the memory budget's activation estimate must stay conservative,
+    # also for the cold first request of a process (run this file alone)
+    px = TIERS["Quality"]
+    x = preprocess(sample, px)
+    sampler = RssSampler(interval=0.005)
+    sampler.start()
+    predict_mask(model, x)
+    sampler.stop()
+    assert sampler.peak - sampler.start_rss <= px * px * ACTIVATION_BYTES_PER_PIXEL
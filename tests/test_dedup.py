@@ -0,0 +1,96 @@
+import io
+import os
+import torch
+
+from dedup import HistoryIndex, dhash, hamming, output_name
+from engine import extract
+
+
+def encode(img, fmt="PNG", **kw):
+    buf = io.BytesIO()
+    img.save(buf, format=fmt, **kw)
+    return buf.getvalue()
+
+
+def test_cached_mask_matches_inference(model, sample, tmp_path):
+    index = HistoryIndex(str(tmp_path / "index.json"))
+    data = encode(sample)
+    entry, kind, sha, h = index.lookup(data, sample, "Fast")
+    assert entry is None and kind == "miss"
+
+    mask = extract(model, sample, "Fast")
+    entry = index.add(sha, h, "Fast", mask)
+    index.save()
+
+    index = HistoryIndex(str(tmp_path / "index.json"))
+    found, kind, _, _ = index.lookup(data, sample, "Fast")
+    assert kind == "exact"
+    assert torch.equal(index.load_mask(found), mask)
+
+
+def test_near_duplicate_and_threshold(sample, tmp_path):
+    index = HistoryIndex(str(tmp_path / "index.json"))
+    _, _, sha, h = index.lookup(encode(sample), sample, "Fast")
+    index.add(sha, h, "Fast", torch.zeros(1, 1, 8, 8))
+
+    resized = sample.resize((sample.width // 2, sample.height // 2))
+    data = encode(resized, "JPEG", quality=60)
+    assert index.lookup(data, resized, "Fast")[1] == "near"
+    assert index.lookup(data, resized, "Quality")[1] == "miss"
+
+    distance = hamming(dhash(sample), dhash(resized))
+    if distance > 0:
+        assert index.lookup(data, resized, "Fast", threshold=distance - 1)[1] == "miss"
+
+
+def test_stats_and_history_outputs(sample, tmp_path):
+    index = HistoryIndex(str(tmp_path / "index.json"))
+    data = encode(sample)
+    _, _, sha, h = index.lookup(data, sample, "Fast")
+    entry = index.add(sha, h, "Fast", torch.ones(1, 1, 8, 8))
+    index.lookup(data, sample, "Fast")
+    index.lookup(data, sample, "Fast", record=False)
+    assert index.stats == {"exact": 1, "near": 0, "miss": 1}
+    assert index.hit_rate() == 0.5
+
+    assert index.output_for(entry, "White") is None
+    (tmp_path / "output_1.png").write_bytes(b"png")
+    index.set_output(entry, "White", "output_1.png")
+    assert index.output_for(entry, "White") == "output_1.png"
+    os.remove(tmp_path / "output_1.png")
+    assert index.output_for(entry, "White") is None
+
+
+def test_concurrent_saves_merge(sample, tmp_path):
+    path = str(tmp_path / "index.json")
+    a, b = HistoryIndex(path), HistoryIndex(path)
+    flipped = sample.transpose(0)
+    for index, img in ((a, sample), (b, flipped)):
+        data = encode(img)
+        _, _, sha, h = index.lookup(data, img, "Fast")
+        entry = index.add(sha, h, "Fast", torch.zeros(1, 1, 8, 8))
+        index.set_output(entry, "White", f"output_{len(data)}.png")
+    a.save()
+    b.save()
+
+    merged = HistoryIndex(path)
+    assert len(merged.entries) == 2
+    assert all(e["outputs"] for e in merged.entries)
+    assert merged.stats["miss"] == 2
+
+
+def test_zero_threshold_is_exact_only(sample, tmp_path):
+    index = HistoryIndex(str(tmp_path / "index.json"))
+    _, _, sha, h = index.lookup(encode(sample), sample, "Fast")
+    index.add(sha, h, "Fast", torch.zeros(1, 1, 8, 8))
+    # same pixels, different bytes: identical dhash but no sha match
+    data = encode(sample, "JPEG", quality=95)
+    assert index.lookup(data, sample, "Fast", threshold=0)[1] == "miss"
+    assert index.lookup(data, sample, "Fast")[1] == "near"
+
+
+def test_output_names_are_not_reused():
+    sha = "ab" * 32
+    assert output_name(sha, "White") != output_name(sha, "Steel Blue")
+    assert output_name(sha, "White") != output_name("cd" * 32, "White")
+    assert " " not in output_name(sha, "Custom Image")
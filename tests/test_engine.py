@@ -0,0 +1,137 @@
+import numpy as np
+import pytest
+import torch
+
+from engine import (TIERS, DISPLAY_SIZE, THUMB_SIZE, BG_OPTIONS, pad_to_stride, preprocess,
+                    predict_logits, predict_mask, apply_bg, render_gallery, extract, open_image)
+
+
+def agreement(a, b):
+    return float((np.asarray(a) == np.asarray(b)).mean())
+
+
+def reference_apply_bg(mask, img, opt, custom=None):
+    # the original float64 implementation
+    mask_np = mask.squeeze().cpu().numpy()
+    mask3 = np.repeat(mask_np[...,None], 3, axis=2)
+    img_np = np.array(img) / 255
+    n = img_np.shape[0]
+    if opt=="Black": bg = np.zeros_like(img_np)
+    elif opt=="White": bg = np.ones_like(img_np)
+    elif opt=="Steel Blue": bg = np.full_like(img_np, [127/255,167/255,201/255])
+    elif opt=="Gradient":
+        x = np.linspace(0,1,n)
+        bg = np.stack([np.tile(x,(n,1))]*3, axis=2)
+    elif opt=="Pattern":
+        p = np.indices((n,n)).sum(0) % 2
+        bg = np.stack([p,p,p], axis=2)
+    elif opt=="Custom Image" and custom is not None:
+        bg = np.array(custom.convert("RGB").resize((n,n))) / 255
+    else:
+        bg = np.zeros_like(img_np)
+    out = img_np * mask3 + bg * (1 - mask3)
+    return (out * 255).astype("uint8")
+
+
+# --------------------------------------
+# GOLDEN OUTPUTS
+# --------------------------------------
+def test_preprocess_golden(sample, golden):
+    x = preprocess(sample, 128).numpy()
+    stored = golden("preprocess_128", x=x)
+    assert x.dtype == np.float32
+    np.testing.assert_allclose(x, stored["x"], atol=1e-6)
+
+
+def test_predict_golden(model, sample, golden):
+    logits = predict_logits(model, preprocess(sample, 128)).numpy()
+    mask = extract(model, sample, "Fast").numpy().astype(np.uint8)
+    stored = golden("predict", logits=logits, mask=mask)
+
+    np.testing.assert_allclose(logits, stored["logits"], rtol=1e-3, atol=1e-2)
+    assert mask.shape == (1, 1, DISPLAY_SIZE, DISPLAY_SIZE)
+    assert agreement(mask, stored["mask"]) > 0.995
+
+
+def test_apply_bg_golden(sample, custom_bg, golden, circle_mask):
+    img = sample.resize((128, 128))
+    mask = circle_mask(128)
+    outs = np.stack([apply_bg(mask, img, opt, custom_bg) for opt in BG_OPTIONS])
+    stored = golden("apply_bg", outs=outs)
+    np.testing.assert_array_equal(outs, stored["outs"])
+
+
+# --------------------------------------
+# OPTIMIZED PATHS VS REFERENCE
+# --------------------------------------
+@pytest.mark.parametrize("opt", BG_OPTIONS)
+def test_apply_bg_matches_float64_reference(sample, custom_bg, circle_mask, opt):
+    img = sample.resize((DISPLAY_SIZE, DISPLAY_SIZE))
+    mask = circle_mask(DISPLAY_SIZE)
+    out = apply_bg(mask, img, opt, custom_bg)
+    ref = reference_apply_bg(mask, img, opt, custom_bg)
+    np.testing.assert_array_equal(out, ref)
+
+
+def test_stride_aligned_input_is_not_padded(model, sample):
+    x = preprocess(sample, TIERS["Fast"])
+    padded, size = pad_to_stride(x)
+    assert padded is x and size == (256, 256)
+    with torch.no_grad():
+        ref = model(x)
+    torch.testing.assert_close(predict_logits(model, x), ref)
+
+
+def test_padding_is_cropped_back(model, sample):
+    x = preprocess(sample, 350)
+    padded, size = pad_to_stride(x)
+    assert padded.shape[-2:] == (352, 352) and size == (350, 350)
+    with torch.no_grad():
+        ref = model(padded)[..., :350, :350]
+    torch.testing.assert_close(predict_logits(model, x), ref)
+
+
+def test_batched_matches_single(model, sample):
+    imgs = [sample, sample.rotate(90), sample.transpose(0)]
+    batch = torch.cat([preprocess(im, 128) for im in imgs])
+    batched = predict_logits(model, batch)
+    for i, im in enumerate(imgs):
+        single = predict_logits(model, preprocess(im, 128))
+        torch.testing.assert_close(batched[i:i+1], single, rtol=1e-3, atol=1e-2)
+
+
+def test_predict_mask_is_thresholded_logits(model, sample):
+    x = preprocess(sample, 128)
+    mask = predict_mask(model, x, (DISPLAY_SIZE, DISPLAY_SIZE))
+    logits = predict_logits(model, x, (DISPLAY_SIZE, DISPLAY_SIZE))
+    assert torch.equal(mask, (logits > 0).float())
+
+
+def test_gallery_matches_apply_bg(sample, custom_bg, circle_mask):
+    img = sample.resize((DISPLAY_SIZE, DISPLAY_SIZE))
+    mask = circle_mask(DISPLAY_SIZE)
+    names, thumbs = render_gallery(mask, img, BG_OPTIONS, custom_bg)
+    assert names == BG_OPTIONS
+    assert thumbs.shape == (len(BG_OPTIONS), THUMB_SIZE, THUMB_SIZE, 3)
+
+    thumb_mask = circle_mask(THUMB_SIZE)
+    thumb_img = img.resize((THUMB_SIZE, THUMB_SIZE))
+    for opt, out in zip(names, thumbs):
+        ref = apply_bg(thumb_mask, thumb_img, opt, custom_bg)
+        # nearest-resized vs freshly drawn circle differ only on the rim
+        assert agreement(out, ref) > 0.97
+
+
+def test_gallery_skips_custom_without_image(sample, circle_mask):
+    names, thumbs = render_gallery(circle_mask(64), sample, BG_OPTIONS)
+    assert "Custom Image" not in names and len(thumbs) == len(names)
+
+
+def test_open_image_draft_keeps_enough_resolution(sample):
+    import io
+    big = sample.resize((2000, 1600))
+    buf = io.BytesIO()
+    big.save(buf, format="JPEG")
+    img = open_image(buf.getvalue(), 512)
+    assert img.mode == "RGB"
+    assert min(img.size) >= 512 and img.size[0] < 2000
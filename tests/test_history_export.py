@@ -0,0 +1,80 @@
+import datetime
+import io
+import os
+import tarfile
+import time
+import zipfile
+
+from history_export import select_entries, iter_zip, iter_tar, write_archive, new_export_path, prune_exports
+
+
+def make_history(tmp_path, n=5, size=3000):
+    hist = tmp_path / "history"
+    hist.mkdir()
+    for i in range(n):
+        (hist / f"output_{i+1}.png").write_bytes(os.urandom(size + i))
+    (hist / "index.json").write_text("{}")
+    return str(hist)
+
+
+def test_zip_roundtrip_is_stored(tmp_path):
+    hist = make_history(tmp_path)
+    paths = select_entries(hist)
+    data = b"".join(iter_zip(paths, chunk_size=1000))
+    with zipfile.ZipFile(io.BytesIO(data)) as zf:
+        assert zf.testzip() is None
+        assert sorted(zf.namelist()) == sorted(os.path.basename(p) for p in paths)
+        for p in paths:
+            info = zf.getinfo(os.path.basename(p))
+            assert info.compress_type == zipfile.ZIP_STORED
+            assert zf.read(info) == open(p, "rb").read()
+
+
+def test_tar_roundtrip(tmp_path):
+    hist = make_history(tmp_path)
+    paths = select_entries(hist)
+    data = b"".join(iter_tar(paths, chunk_size=1000))
+    with tarfile.open(fileobj=io.BytesIO(data)) as tf:
+        for p in paths:
+            assert tf.extractfile(os.path.basename(p)).read() == open(p, "rb").read()
+
+
+def test_chunks_stay_small(tmp_path):
+    hist = make_history(tmp_path, n=3, size=50_000)
+    for gen in (iter_zip, iter_tar):
+        biggest = max(len(c) for c in gen(select_entries(hist), chunk_size=4096))
+        assert biggest <= 4096 + 1024
+
+
+def test_select_by_page_and_date(tmp_path):
+    hist = make_history(tmp_path, n=5)
+    assert len(select_entries(hist, page=1, page_size=2)) == 2
+    assert len(select_entries(hist, page=3, page_size=2)) == 1
+
+    old = os.path.join(hist, "output_1.png")
+    stamp = datetime.datetime(2020, 1, 15).timestamp()
+    os.utime(old, (stamp, stamp))
+    only_old = select_entries(hist, since=datetime.date(2020, 1, 1), until=datetime.date(2020, 1, 31))
+    assert only_old == [old]
+    assert old not in select_entries(hist, since=datetime.date(2021, 1, 1))
+
+
+def test_write_archive_to_file(tmp_path):
+    hist = make_history(tmp_path)
+    out = str(tmp_path / "out.zip")
+    size = write_archive(select_entries(hist), out, "zip")
+    assert size == os.path.getsize(out)
+    assert len(zipfile.ZipFile(out).namelist()) == 5
+
+
+def test_exports_are_unique_and_pruned(tmp_path):
+    export_dir = str(tmp_path / "exports")
+    old, new = new_export_path(export_dir, "zip"), new_export_path(export_dir, "tar")
+    assert old != new and old.endswith(".zip")
+    stamp = time.time() - 7200
+    os.utime(old, (stamp, stamp))
+    (tmp_path / "exports" / "keep.txt").write_text("x")
+    os.utime(tmp_path / "exports" / "keep.txt", (stamp, stamp))
+
+    assert prune_exports(export_dir, max_age=3600) == [old]
+    assert sorted(os.listdir(export_dir)) == sorted(["keep.txt", os.path.basename(new)])
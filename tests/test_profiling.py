@@ -0,0 +1,34 @@
+import os
+import threading
+import torch
+
+from profiling import profile_request
+
+
+def test_other_threads_are_not_labelled(model, tmp_path):
+    x = torch.rand(1, 3, 64, 64)
+    errors = []
+
+    def other():
+        try:
+            with torch.no_grad():
+                model(x)
+        except Exception as e:
+            errors.append(e)
+
+    with profile_request(model, "t", enabled=True, out_dir=str(tmp_path)) as prof:
+        with torch.no_grad():
+            model(x)
+        t = threading.Thread(target=other)
+        t.start()
+        t.join()
+    assert not errors
+    names = {e.key for e in prof.key_averages()}
+    assert "encoder" in names and "extra_head" in names
+
+
+def test_same_second_traces_do_not_collide(tmp_path):
+    for _ in range(3):
+        with profile_request(None, "t", enabled=True, out_dir=str(tmp_path)):
+            torch.ones(4).sum()
+    assert len([f for f in os.listdir(tmp_path) if f.endswith(".json")]) == 3
@@ -0,0 +1,69 @@
+import numpy as np
+import torch
+from PIL import Image
+
+import video
+from engine import extract
+
+
+def frames(sample, n, step=0):
+    base = np.asarray(sample.resize((192, 160)))
+    return [Image.fromarray(np.roll(base, i * step, axis=1)) for i in range(n)]
+
+
+def test_every_keyframe_matches_single_frame(model, sample):
+    seq = frames(sample, 5, step=9)
+    out = list(video.extract_sequence(model, iter(seq), 128, batch_size=2, threshold=-1))
+    assert [f for f, _ in out] == seq
+    for frame, mask in out:
+        ref = extract(model, frame, 128, out_size=(160, 192))
+        assert float((mask == ref[0]).float().mean()) > 0.995
+
+
+def test_static_frames_reuse_one_inference(model, sample, monkeypatch):
+    calls = []
+    real = video.predict_mask
+    monkeypatch.setattr(video, "predict_mask", lambda *a, **kw: calls.append(a[1].shape[0]) or real(*a, **kw))
+
+    out = list(video.extract_sequence(model, iter(frames(sample, 10)), 128, batch_size=4))
+    assert len(out) == 10 and sum(calls) == 1
+    first = out[0][1]
+    assert all(torch.equal(mask, first) for _, mask in out)
+
+
+def test_size_change_after_flush_gets_its_own_mask(model):
+    seq = [Image.new("RGB", (64, 48), "red"), Image.new("RGB", (80, 60), "red"),
+           Image.new("RGB", (80, 60), "red"), Image.new("RGB", (64, 48), "red")]
+    for batch_size in (1, 4):
+        out = list(video.extract_sequence(model, iter(seq), 64, batch_size=batch_size))
+        assert [tuple(m.shape[-2:]) for _, m in out] == [(48, 64), (60, 80), (60, 80), (48, 64)]
+
+
+def test_shift_is_applied_to_reused_mask():
+    mask = torch.zeros(1, 8, 8)
+    mask[0, 2, 3] = 1
+    moved = video.shift_mask(mask, 1, -2)
+    assert moved[0, 3, 1] == 1 and moved.sum() == 1
+
+
+def test_estimate_shift_recovers_translation(sample):
+    sig = video.signature(sample)
+    rolled = np.roll(sig, (3, -5), axis=(0, 1))
+    assert video.estimate_shift(sig, rolled) == (3, -5)
+
+
+def test_pending_frames_are_bounded(model, sample):
+    # a long static sequence never holds more than 4 * batch_size frames
+    batch_size = 2
+    pulled = 0
+    def source():
+        nonlocal pulled
+        for f in frames(sample, 30):
+            pulled += 1
+            yield f
+
+    held = []
+    for n, _ in enumerate(video.extract_sequence(model, source(), 128, batch_size=batch_size)):
+        held.append(pulled - n)
+    assert n + 1 == 30
+    assert max(held) <= 4 * batch_size
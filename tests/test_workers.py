@@ -0,0 +1,42 @@
+import io
+import os
+import signal
+import pytest
+
+from engine import extract
+from workers import WorkerPool, plan_cores
+
+
+def test_plan_cores_blocks(monkeypatch):
+    monkeypatch.setattr("workers.available_cores", lambda: list(range(64)))
+    plan = plan_cores()
+    assert len(plan) == 8 and all(len(c) == 8 for c in plan)
+    assert sorted(c for cores in plan for c in cores) == list(range(64))
+    assert plan_cores(workers=4, threads=2) == [[0, 1], [2, 3], [4, 5], [6, 7]]
+
+
+@pytest.fixture(scope="module")
+def pool():
+    pool = WorkerPool(workers=1, threads=1, random_weights=True)
+    yield pool
+    pool.shutdown()
+
+
+def test_pool_matches_in_process(model, sample, pool):
+    buf = io.BytesIO()
+    sample.save(buf, format="PNG")
+    mask = pool.extract(buf.getvalue(), "Fast")
+    ref = extract(model, sample, "Fast")
+    assert mask.shape == ref.shape
+    assert float((mask == ref).float().mean()) > 0.995
+
+
+def test_pool_recovers_from_dead_worker(model, sample, pool):
+    buf = io.BytesIO()
+    sample.save(buf, format="PNG")
+    pool.extract(buf.getvalue(), "Fast")
+    for pid in list(pool.executor._processes):
+        os.kill(pid, signal.SIGKILL)
+    mask = pool.extract(buf.getvalue(), "Fast")
+    ref = extract(model, sample, "Fast")
+    assert float((mask == ref).float().mean()) > 0.995
@@ -0,0 +1,160 @@
+import argparse
+import os
+import numpy as np
+import torch
+from PIL import Image, ImageSequence
+
+from engine import TIERS, DEFAULT_TIER, MODEL_PATH, load_model, preprocess, predict_mask, apply_bg
+from membudget import max_batch_size
+
+# --------------------------------------
+# FRAME-SEQUENCE EXTRACTION
+# videos, animated images and folders of frames are decoded
+# one frame at a time; frames that barely changed since the
+# last inferred frame reuse its mask (shifted by the global
+# motion) instead of going through the model again
+#
+#   python video.py product.mp4 --out frames_out --bg White
+# --------------------------------------
+VALID_EXT = (".png", ".jpg", ".jpeg")
+SIG_SIZE = 64
+
+
+def iter_frames(source):
+    if os.path.isdir(source):
+        for f in sorted(os.listdir(source)):
+            if f.lower().endswith(VALID_EXT):
+                with Image.open(os.path.join(source, f)) as im:
+                    yield im.convert("RGB")
+        return
+
+    if source.lower().endswith((".gif", ".webp", ".tif", ".tiff")):
+        with Image.open(source) as im:
+            for frame in ImageSequence.Iterator(im):
+                yield frame.convert("RGB")
+        return
+
+    import av   # optional, only needed for video files
+    with av.open(source) as container:
+        stream = container.streams.video[0]
+        stream.thread_type = "AUTO"
+        for frame in container.decode(stream):
+            yield frame.to_image().convert("RGB")
+
+
+def signature(img):
+    small = img.convert("L").resize((SIG_SIZE, SIG_SIZE))
+    return np.asarray(small, dtype=np.float32) / 255.0
+
+
+def estimate_shift(prev_sig, sig):
+    # phase correlation: global translation between two signatures
+    f = np.fft.fft2(prev_sig) * np.conj(np.fft.fft2(sig))
+    r = np.fft.ifft2(f / (np.abs(f) + 1e-8)).real
+    dy, dx = np.unravel_index(np.argmax(r), r.shape)
+    if dy > SIG_SIZE // 2: dy -= SIG_SIZE
+    if dx > SIG_SIZE // 2: dx -= SIG_SIZE
+    return -dy, -dx
+
+
+def shift_mask(mask, dy, dx):
+    if dy == 0 and dx == 0:
+        return mask
+    h, w = mask.shape[-2:]
+    out = torch.zeros_like(mask)
+    ys, yd = (slice(0, h - dy), slice(dy, h)) if dy >= 0 else (slice(-dy, h), slice(0, h + dy))
+    xs, xd = (slice(0, w - dx), slice(dx, w)) if dx >= 0 else (slice(-dx, w), slice(0, w + dx))
+    out[..., yd, xd] = mask[..., ys, xs]
+    return out
+
+
+def extract_sequence(model, frames, tier=DEFAULT_TIER, device="cpu",
+                     batch_size=8, threshold=0.02, warp=True):
+    # yields (frame, mask) in order; at most batch_size keyframes and
+    # 4 * batch_size frames are held at once, whatever the length
+    size = TIERS[tier] if isinstance(tier, str) else tier
+    max_pending = 4 * batch_size
+    pending = []       # [frame, keyframe slot, shift]
+    keyframes = []     # frames waiting for inference
+    key_sig = None
+    last_mask = None
+    last_size = None   # survives flushes, unlike pending
+
+    def flush():
+        nonlocal last_mask
+        masks = []
+        if keyframes:
+            out_size = keyframes[0].size[::-1]
+            x = torch.cat([preprocess(f, size, device) for f in keyframes])
+            masks = list(predict_mask(model, x, out_size))
+        for frame, slot, (dy, dx) in pending:
+            base = masks[slot] if slot is not None else last_mask
+            yield frame, shift_mask(base, dy, dx)
+        if masks:
+            last_mask = masks[-1]
+        pending.clear()
+        keyframes.clear()
+
+    for frame in frames:
+        if last_size is not None and frame.size != last_size:
+            # masks can't be batched or reused across a size change
+            yield from flush()
+            key_sig = None
+            last_mask = None
+        last_size = frame.size
+
+        sig = signature(frame)
+        shift = (0, 0)
+        is_key = key_sig is None
+        if not is_key:
+            dy, dx = estimate_shift(key_sig, sig) if warp else (0, 0)
+            moved = np.roll(key_sig, (dy, dx), axis=(0, 1))
+            is_key = float(np.abs(moved - sig).mean()) > threshold
+            if not is_key:
+                h, w = frame.size[1], frame.size[0]
+                shift = (dy * h // SIG_SIZE, dx * w // SIG_SIZE)
+
+        if is_key:
+            key_sig = sig
+            keyframes.append(frame)
+            pending.append((frame, len(keyframes) - 1, (0, 0)))
+        else:
+            slot = len(keyframes) - 1 if keyframes else None
+            pending.append((frame, slot, shift))
+
+        if len(keyframes) >= batch_size or len(pending) >= max_pending:
+            yield from flush()
+
+    yield from flush()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Extract the subject from every frame of a video or image sequence")
+    parser.add_argument("source", help="video file, animated image or folder of frames")
+    parser.add_argument("--out", default="sequence_out")
+    parser.add_argument("--bg", default="Black",
+                        choices=["Black","White","Steel Blue","Gradient","Pattern"])
+    parser.add_argument("--tier", default=DEFAULT_TIER, choices=list(TIERS))
+    parser.add_argument("--batch-size", type=int, default=8)
+    parser.add_argument("--threshold", type=float, default=0.02,
+                        help="mean frame difference below which the last mask is reused")
+    parser.add_argument("--no-warp", action="store_true", help="reuse masks without motion compensation")
+    parser.add_argument("--weights", default=MODEL_PATH)
+    args = parser.parse_args()
+
+    model, device = load_model(args.weights)
+    os.makedirs(args.out, exist_ok=True)
+    # VISIONEXTRACT_MEMORY_BUDGET_MB caps how many frames are batched
+    batch_size = max_batch_size(TIERS[args.tier], requested=args.batch_size)
+
+    total = 0
+    for i, (frame, mask) in enumerate(extract_sequence(
+            model, iter_frames(args.source), args.tier, device,
+            batch_size, args.threshold, not args.no_warp)):
+        Image.fromarray(apply_bg(mask, frame, args.bg)).save(os.path.join(args.out, f"frame_{i+1:05d}.png"))
+        total += 1
+    print(f"{total} frames written to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,173 @@
+import argparse
+import io
+import multiprocessing as mp
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+import numpy as np
+import torch
+from PIL import Image
+
+from engine import TIERS, DEFAULT_TIER, DISPLAY_SIZE, MODEL_PATH, download_model, load_model, extract
+
+# --------------------------------------
+# CPU WORKER POOL
+# N inference processes, each pinned to its own set of cores
+# with a fixed torch thread count, all mapping the same
+# checkpoint file so the weights are in memory only once;
+# a worker that dies (OOM kill, segfault) breaks the executor,
+# so the pool starts a fresh one and retries the request once
+#
+#   VISIONEXTRACT_WORKERS=8 streamlit run app.py
+#   python workers.py path/to/images --workers 8 --threads 8
+# --------------------------------------
+MAX_USEFUL_THREADS = 8   # conv kernels stop scaling past this
+
+
+def available_cores():
+    if hasattr(os, "sched_getaffinity"):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count() or 1))
+
+
+def plan_cores(workers=None, threads=None):
+    cores = available_cores()
+    if threads is None:
+        n = workers or max(1, len(cores) // MAX_USEFUL_THREADS)
+        threads = max(1, min(MAX_USEFUL_THREADS, len(cores) // n))
+    if workers is None:
+        workers = max(1, len(cores) // threads)
+    # contiguous blocks; oversubscribed pools wrap around
+    return [
+        [cores[(w * threads + t) % len(cores)] for t in range(threads)]
+        for w in range(workers)
+    ]
+
+
+_worker = {}
+
+
+def _init_worker(core_queue, threads, weights):
+    cores = core_queue.get()
+    if hasattr(os, "sched_setaffinity"):
+        os.sched_setaffinity(0, cores)
+    torch.set_num_threads(threads)
+    try:
+        torch.set_num_interop_threads(1)
+    except RuntimeError:
+        pass
+    _worker["model"], _ = load_model(weights, "cpu", mmap=True)
+
+
+def _run(data, tier, out_size):
+    img = Image.open(io.BytesIO(data)).convert("RGB")
+    mask = extract(_worker["model"], img, tier, "cpu", out_size)
+    return mask.squeeze().numpy().astype(np.uint8)
+
+
+class WorkerPool:
+    def __init__(self, workers=None, threads=None, weights=MODEL_PATH, random_weights=False):
+        self.core_sets = plan_cores(workers, threads)
+        self.threads = len(self.core_sets[0])
+        self._tmp = None
+
+        if random_weights:
+            # write one seeded checkpoint so the workers can still share it
+            model, _ = load_model(device="cpu", random_weights=True)
+            fd, self._tmp = tempfile.mkstemp(suffix=".pth")
+            os.close(fd)
+            torch.save(model.state_dict(), self._tmp)
+            weights = self._tmp
+            del model
+        elif not os.path.exists(weights):
+            # download once in the parent, not N times in the workers
+            download_model(weights)
+        self.weights = weights
+        self._restart_lock = threading.Lock()
+        self.executor = self._start()
+
+    def _start(self):
+        ctx = mp.get_context("spawn")
+        core_queue = ctx.Queue()
+        for cores in self.core_sets:
+            core_queue.put(cores)
+        return ProcessPoolExecutor(
+            max_workers=len(self.core_sets),
+            mp_context=ctx,
+            initializer=_init_worker,
+            initargs=(core_queue, self.threads, self.weights),
+        )
+
+    def restart(self, broken=None):
+        # several sessions can hit the same broken executor; replace it once
+        with self._restart_lock:
+            if broken is not None and self.executor is not broken:
+                return
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            self.executor = self._start()
+
+    @property
+    def workers(self):
+        return len(self.core_sets)
+
+    def submit(self, data, tier=DEFAULT_TIER, out_size=(DISPLAY_SIZE, DISPLAY_SIZE)):
+        # data: encoded image bytes; result: uint8 mask
+        return self.executor.submit(_run, data, tier, out_size)
+
+    def extract(self, data, tier=DEFAULT_TIER, out_size=(DISPLAY_SIZE, DISPLAY_SIZE)):
+        executor = self.executor
+        try:
+            mask = executor.submit(_run, data, tier, out_size).result()
+        except BrokenProcessPool:
+            self.restart(executor)
+            mask = self.submit(data, tier, out_size).result()
+        return torch.from_numpy(mask.astype(np.float32))[None, None]
+
+    def shutdown(self):
+        self.executor.shutdown()
+        if self._tmp and os.path.exists(self._tmp):
+            os.remove(self._tmp)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Throughput of the CPU worker pool")
+    parser.add_argument("images", help="folder of images to push through the pool")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--threads", type=int, default=None, help="torch threads per worker")
+    parser.add_argument("--tier", default=DEFAULT_TIER, choices=list(TIERS))
+    parser.add_argument("--rounds", type=int, default=3)
+    parser.add_argument("--weights", default=MODEL_PATH)
+    parser.add_argument("--random-weights", action="store_true")
+    args = parser.parse_args()
+
+    blobs = []
+    for f in sorted(os.listdir(args.images)):
+        if f.lower().endswith((".png", ".jpg", ".jpeg")):
+            with open(os.path.join(args.images, f), "rb") as fh:
+                blobs.append(fh.read())
+    if not blobs:
+        parser.error(f"no images found in {args.images}")
+
+    pool = WorkerPool(args.workers, args.threads, args.weights, args.random_weights)
+    try:
+        # warm-up: starts every worker and loads its model
+        for fut in [pool.submit(blobs[i % len(blobs)], args.tier) for i in range(2 * pool.workers)]:
+            fut.result()
+
+        start = time.perf_counter()
+        futures = [pool.submit(b, args.tier) for _ in range(args.rounds) for b in blobs]
+        for fut in futures:
+            fut.result()
+        elapsed = time.perf_counter() - start
+    finally:
+        pool.shutdown()
+
+    print(f"{pool.workers} workers x {pool.threads} threads, cores {pool.core_sets}")
+    print(f"{len(futures)} images in {elapsed:.2f}s = {len(futures) / elapsed:.2f} img/s")
+
+
+if __name__ == "__main__":
+    main()